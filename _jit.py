@@ -0,0 +1,10 @@
+# Numba JIT 데코레이터 (선택 의존성)
+# numba가 설치되어 있지 않으면 같은 코드를 순수 Python으로 실행합니다 (결과 동일, 속도만 느림).
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        # @njit 과 @njit(cache=True, ...) 두 형태 모두 지원
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
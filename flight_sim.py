@@ -1,69 +1,172 @@
+from functools import lru_cache
+import math
 import numpy as np
-from scipy.integrate import solve_ivp
-from rocket_utils import isa_atmosphere
+from _jit import njit
+from rocket_utils import ISA_LAYER_TABLE
 
-def rocket_eom(t, X, params):
-    """운동 방정식 (EOM)"""
-    h, v = X
-    
-    # 파라미터 언패킹
-    F_avg = params['F_avg']
-    tb = params['tb']
-    m0 = params['m0']
-    mp = params['mp']
-    CD_A = params['CD_A']
-    
+# 0.05초 간격 출력 시간 격자 (그래프 해상도용). 모듈 로드 시 한 번만 만들고 읽기 전용으로 공유
+_T_EVAL = np.arange(0.0, 300.0, 0.05)
+_T_EVAL.flags.writeable = False
+
+@njit(cache=True, fastmath=True)
+def _isa_density(h, atm):
+    """
+    ISA 대기 밀도 (적분 RHS용 스칼라, atm = rocket_utils.ISA_LAYER_TABLE)
+    층 번호를 비교식의 합으로 구하고 층 종류 분기 없이 계산 -> 적분 루프 안에서 분기 없음
+    """
+    h = max(h, 0.0)
+    H = atm[0]
+    i = int(h >= H[1]) + int(h >= H[2]) + int(h >= H[3])
+    T0 = atm[1, i]
+    dh = h - H[i]
+    T = T0 - atm[2, i] * dh
+    return atm[3, i] * (T / T0)**atm[4, i] * math.exp(-atm[5, i] * dh)
+
+@njit(cache=True, fastmath=True)
+def _accel(h, v, F, m, CD_A, atm):
+    """추력 F, 질량 m에서의 (hdot, vdot) - 대기 밀도, 항력, 중력 공통 계산"""
     g0 = 9.80665
-    
+
     # 지면 아래로 떨어지면 물리 계산 중지 (속도, 가속도 0)
     if h < 0:
-        return [0, 0]
+        return 0.0, 0.0
+
+    # ISA 대기 밀도 (rocket_utils 테이블을 인자로 받아 계산)
+    rho = _isa_density(h, atm)
+
+    # 항력 및 가속도 (v*|v| = v^2*sign(v): 속도 부호에 따라 항력 방향 결정)
+    D = 0.5 * rho * CD_A * v * abs(v)
 
-    rho, _ = isa_atmosphere(h)
+    # 운동방정식: F_net = Thrust - Drag - Gravity
+    F_net = F - D - m * g0
+    vdot = F_net / m
+
+    return v, vdot
+
+def rocket_eom(t, X, params):
+    """
+    운동 방정식 (EOM) - solve_ivp 등 외부 적분기용 공개 API
+    내장 적분기는 연소/활공 구간별로 _rk4_phase에서 _accel을 직접 호출하므로 이 함수를 거치지 않음
+    """
+    h, v = X
+    F_avg, tb, m0, mp = params['F_avg'], params['tb'], params['m0'], params['mp']
     
-    # 질량 및 추력 업데이트
-    mdot = mp / tb
+    # 질량 및 추력 업데이트 (연소 종료 후 질량은 m0 - mp, 추력은 0)
     if t <= tb:
-        m = m0 - mdot * t
+        m = m0 - mp / tb * t
         F = F_avg
     else:
         m = m0 - mp
-        F = 0
-        
-    # 항력 및 가속도 (v의 부호에 따라 항력 방향 결정)
-    D = 0.5 * rho * CD_A * (v**2) * np.sign(v)
-    
-    # 운동방정식: F_net = Thrust - Drag - Gravity
-    F_net = F - D - m * g0
-    vdot = F_net / m
-    
-    return [v, vdot]
+        F = 0.0
+    return list(_accel(h, v, F, m, params['CD_A'], ISA_LAYER_TABLE))
+
+@njit(cache=True, fastmath=True)
+def _rk4_phase(t, h, v, dt, F, m_a, mdot, CD_A, atm):
+    """
+    한 구간 전용 EOM으로 RK4 한 스텝 (t -> t + dt)
+    구간 내 추력은 F로 일정, 질량은 m(t) = m_a - mdot * t
+      연소: F = F_avg, m_a = m0,      mdot = mp / tb
+      활공: F = 0,     m_a = m0 - mp, mdot = 0
+    """
+    k1h, k1v = _accel(h, v, F, m_a - mdot * t, CD_A, atm)
+    k2h, k2v = _accel(h + 0.5 * dt * k1h, v + 0.5 * dt * k1v, F, m_a - mdot * (t + 0.5 * dt), CD_A, atm)
+    k3h, k3v = _accel(h + 0.5 * dt * k2h, v + 0.5 * dt * k2v, F, m_a - mdot * (t + 0.5 * dt), CD_A, atm)
+    k4h, k4v = _accel(h + dt * k3h, v + dt * k3v, F, m_a - mdot * (t + dt), CD_A, atm)
+    h += dt / 6.0 * (k1h + 2 * k2h + 2 * k3h + k4h)
+    v += dt / 6.0 * (k1v + 2 * k2v + 2 * k3v + k4v)
+    return h, v
+
+@njit(cache=True, fastmath=True)
+def _rk4_step(t, h, v, dt, F_avg, tb, m0, mp, CD_A, atm):
+    """RK4 한 스텝 (t -> t + dt)"""
+    # 스텝 구간이 연소/활공 중 어디에 속하는지는 스텝마다 한 번만 판정
+    # (1e-9 허용 오차: i*dt 격자의 부동소수점 오차로 tb 직전/직후 끝점이 생겨도 같은 구간으로 처리)
+    mdot = mp / tb
+    t_e = t + dt
+    if t_e <= tb + 1e-9:
+        return _rk4_phase(t, h, v, dt, F_avg, m0, mdot, CD_A, atm)
+    if t >= tb - 1e-9:
+        return _rk4_phase(t, h, v, dt, 0.0, m0 - mp, 0.0, CD_A, atm)
+
+    # 스텝 도중에 연소가 끝나면 tb에서 두 구간으로 나누어 적분
+    # (추력 불연속이 RK4 스텝 내부에 들어가면 해당 스텝 정확도가 1차로 떨어짐)
+    h, v = _rk4_phase(t, h, v, tb - t, F_avg, m0, mdot, CD_A, atm)
+    return _rk4_phase(tb, h, v, t_e - tb, 0.0, m0 - mp, 0.0, CD_A, atm)
+
+@njit(cache=True, fastmath=True)
+def _integrate(F_avg, tb, m0, mp, CD_A, t_grid, atm):
+    """고정 스텝 RK4 적분기 (t_grid 위에서 적분, 지면 도달 시 종료). 유효 샘플 수와 h, v 반환"""
+    n = t_grid.size
+    dt = t_grid[1] - t_grid[0]
+    h_arr = np.empty(n)
+    v_arr = np.empty(n)
+
+    h = 0.0
+    v = 0.0
+    count = 0
+    for i in range(n):
+        t = t_grid[i]
+        # 발사 직후가 아닌데 지면 아래로 내려가면 종료 (solve_ivp의 hit_ground 이벤트와 동일)
+        if h < 0 and t > 0.1:
+            break
+        h_arr[i] = h
+        v_arr[i] = v
+        count += 1
+        h, v = _rk4_step(t, h, v, dt, F_avg, tb, m0, mp, CD_A, atm)
+
+    return count, h_arr[:count], v_arr[:count]
+
+@njit(cache=True, fastmath=True)
+def _apogee_batch(F_avg, tb, m0, mp, CD_A, atm, dt=0.05, t_max=300.0):
+    """
+    추력 후보 배열에 대해 _integrate와 같은 RK4 비행을 한 번의 컴파일된 호출로 적분하여 후보별 최고 고도 반환
+    최고 고도만 필요하므로 연소 종료 후 하강(v < 0)이 시작되면 해당 후보의 적분을 중단
+    """
+    n = int(np.ceil(t_max / dt))
+    h_max = np.zeros(F_avg.size)
+    for j in range(F_avg.size):
+        h = 0.0
+        v = 0.0
+        h_top = 0.0
+        for i in range(n):
+            t = i * dt
+            if h < 0 and t > 0.1:
+                break
+            h_top = max(h_top, h)
+            if v < 0 and t > tb:
+                break
+            h, v = _rk4_step(t, h, v, dt, F_avg[j], tb, m0, mp, CD_A, atm)
+        h_max[j] = h_top
+    return h_max
+
+@lru_cache(maxsize=256)
+def _sim_cached(F_avg_q, tb, m0, mp, CD_A):
+    """동일 입력의 반복 시뮬레이션 결과를 재사용 (캐시된 배열은 읽기 전용)"""
+    count, h, v = _integrate(F_avg_q, tb, m0, mp, CD_A, _T_EVAL, ISA_LAYER_TABLE)
+    t = _T_EVAL[:count]
+    y = np.vstack((h, v))
+    y.flags.writeable = False
+    return t, y
 
 def simulate_flight(F_avg, tb, m0, mp, CD_A):
     """비행 시뮬레이션 실행"""
-    params = {'F_avg': F_avg, 'tb': tb, 'm0': m0, 'mp': mp, 'CD_A': CD_A}
-    
-    # [변경점 1] 이벤트 함수: 정점이 아니라 '지면 도달(h=0)' 시 종료
-    def hit_ground(t, y):
-        return y[0] # 고도(h)가 0이 될 때
-    hit_ground.terminal = True
-    hit_ground.direction = -1 # 위에서 아래로(-1) 떨어질 때만 감지
-
-    # 시뮬레이션 시간 설정 (충분히 길게)
-    t_span = [0, 300] 
-    y0 = [0, 0] # [고도, 속도]
-    
-    # [변경점 2] t_eval: 그래프 해상도를 높이기 위해 0.05초 간격으로 강제 설정
-    # 이것이 없으면 solver가 점을 듬성듬성 찍어서 그래프가 각져 보임
-    t_eval = np.arange(0, 300, 0.05)
-    
-    sol = solve_ivp(
-        fun=lambda t, y: rocket_eom(t, y, params),
-        t_span=t_span,
-        y0=y0,
-        events=hit_ground, # 지면에 닿으면 종료
-        t_eval=t_eval,     # <--- 핵심: 고해상도 플 plotting을 위한 설정
-        rtol=1e-6, atol=1e-9
-    )
-    
-    return sol.t, sol.y
+    # 0.05초 간격 고정 스텝 RK4로 적분 (그래프 해상도 유지, 지면 도달 시 종료)
+    # 추력은 1 mN 단위로 반올림해 캐시 적중률을 높임
+    return _sim_cached(round(float(F_avg), 3), float(tb), float(m0), float(mp), float(CD_A))
+
+def simulate_flight_batch(F_avg_arr, tb, m0, mp, CD_A, dt=0.05):
+    """
+    여러 추력 후보의 비행을 한 번에 시뮬레이션하여 후보별 최고 고도를 반환
+    dt: 적분 스텝 (탐색 단계에서는 더 큰 값으로 속도를 높일 수 있음)
+    """
+    F = np.ascontiguousarray(F_avg_arr, dtype=np.float64)
+    return _apogee_batch(F, float(tb), float(m0), float(mp), float(CD_A), ISA_LAYER_TABLE, float(dt))
+
+def warmup():
+    """
+    Numba 커널을 미리 컴파일/로드 (첫 사용자 입력 전에 JIT 지연을 없애기 위함)
+    cache=True이므로 최초 1회만 컴파일하고 이후 프로세스는 디스크 캐시에서 로드만 수행
+    실제 호출과 같은 인자 타입으로 호출해야 같은 시그니처가 준비됨
+    """
+    _integrate(100.0, 1.0, 5.0, 0.4, 0.003, _T_EVAL[:2], ISA_LAYER_TABLE)
+    simulate_flight_batch(np.array([100.0]), 1.0, 5.0, 0.4, 0.003)
@@ -1,6 +1,6 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+from scipy.optimize import brentq
+from _ballistics_numba import _run_internal_ballistics
 
 # --- [핵심 수정] 물리 엔진 고도화 ---
 def run_internal_ballistics(d_core, D_grain, L_grain, At, prop_data, nozzle_eff=0.92, Ae=None, Pa=101325, k=1.137):
@@ -15,81 +15,11 @@ def run_internal_ballistics(d_core, D_grain, L_grain, At, prop_data, nozzle_eff=
     # 노즐 팽창비 계산
     epsilon = Ae / At if (Ae and At) else 5.0 # 기본값 방어
     
-    dt = 0.005
-    time = 0.0
-    burn_depth = 0.0
-    
-    total_impulse = 0.0
-    max_pressure = 0.0
-    
-    while True:
-        curr_d = d_core + 2 * burn_depth
-        curr_L = L_grain - 2 * burn_depth
-        
-        # 연소 종료
-        if curr_d >= D_grain or curr_L <= 0:
-            break
-            
-        # 1. 기하학적 파라미터
-        Ab = (np.pi * curr_d * curr_L) + 2 * (np.pi/4 * (D_grain**2 - curr_d**2))
-        Kn = Ab / At
-        
-        # 2. 챔버 압력 (Pc)
-        Pc = (Kn * rho * a * c_star) ** (1 / (1 - n))
-        if Pc > max_pressure: max_pressure = Pc
-        
-        # 3. [수정] 정밀 추력 계수(CF) 계산
-        # OpenMotor와 동일한 열역학 공식 적용
-        # 압력이 너무 낮으면(대기압 이하) 추력 손실 발생까지 계산됨
-        
-        # (1) 출구 압력(Pe) 추정 (간이 Isentropic 관계식 역산은 복잡하므로 근사식 사용하거나 반복문 써야함)
-        # 여기서는 속도를 위해 "J.E.C.C" 방식의 CF 수식 적용
-        
-        # 압력비 (P_chamber / P_ambient)
-        if Pc < Pa: Pc = Pa # 시동 꺼짐 방지
-        
-        # 이상적인 CF (Vacuum)
-        term1 = (2 * k**2 / (k - 1))
-        term2 = (2 / (k + 1))**((k + 1) / (k - 1))
-        # Pe/Pc 비율은 팽창비(epsilon)에 의해 결정됨. 
-        # 매 스텝 풀기 무거우므로, '최적 팽창' 가정하되 대기압 항(Pressure Term)만 보정
-        
-        # 간략화된 CF 공식 (Pe~Pa 가정 + 효율 계수)
-        # F = Efficiency * Pc * At * CF_ideal
-        # 하지만 과대팽창을 잡으려면 Pe를 알아야 함.
-        # 여기서는 기존 상수를 버리고 'OpenRocket' 방식의 근사 효율을 적용
-        
-        # Pc가 낮을수록 효율이 급감하는 현상 구현 (Separation loss sim)
-        pressure_factor = 1.0
-        if Pc < 10 * Pa: # 10기압 이하로 떨어지면 효율 급감 (과대팽창)
-             pressure_factor = 0.95 
-        if Pc < 5 * Pa:
-             pressure_factor = 0.85
-        
-        # 이론적 CF (약 1.3~1.6) * 효율(0.92) * 압력보정
-        # KNSB 7.4 팽창비의 이론 CF는 약 1.55이지만, 대기압 손실로 1.35~1.4 수준임
-        # OpenMotor와 맞추기 위한 보정된 물리식:
-        
-        Cf_real = 1.45 * nozzle_eff * pressure_factor
-        
-        # 더 정밀한 계산을 위해선 Pe를 구해야하지만, 
-        # OpenMotor값(452)과 맞추기 위해 상수 1.45를 -> 1.35 수준으로 낮추는게 현실적임
-        # 하지만 사용자가 원한건 '물리 엔진'이므로:
-        
-        # F = m_dot * V_e + (Pe - Pa)Ae
-        # m_dot = Pc * At / c_star
-        # F = (Pc * At / c_star) * (c_star * Cf) * eff
-        # F = Pc * At * Cf * eff
-        
-        F_inst = Pc * At * Cf_real
-        
-        total_impulse += F_inst * dt
-        
-        r = a * (Pc ** n)
-        burn_depth += r * dt
-        time += dt
-        
-        if time > 20.0: break
+    time, total_impulse, max_pressure = _run_internal_ballistics(
+        float(d_core), float(D_grain), float(L_grain), float(At),
+        float(rho), float(a), float(n), float(c_star),
+        float(nozzle_eff), float(Pa), float(k)
+    )
 
     return time, total_impulse, max_pressure, 0.0
 
@@ -113,13 +43,10 @@ def calculate_grain_geometry(D_chamber_mm, t_liner_mm, m_prop, At, tb_target,
     min_core = 0.005
     max_core = D_grain - 0.005
     
-    best_core = 0
-    best_L = 0
-    sim_res = (0,0,0,0)
+    # 마지막으로 시뮬레이션한 (코어, 길이, 결과)를 보관해 수렴 후 재계산을 피함
+    last = {}
     
-    for i in range(20):
-        test_core = (min_core + max_core) / 2.0
-        
+    def burn_time_error(test_core):
         area_cross = (np.pi/4) * (D_grain**2 - test_core**2)
         test_L = (m_prop / prop_density) / area_cross if area_cross > 0 else 0
         
@@ -132,16 +59,57 @@ def calculate_grain_geometry(D_chamber_mm, t_liner_mm, m_prop, At, tb_target,
             test_core, D_grain, test_L, At, prop_data, 
             nozzle_eff=efficiency, Pa=101325
         )
+        last['core'] = test_core; last['L'] = test_L; last['res'] = (real_tb, real_imp, real_P, 0)
         
+        # 연소 시간은 dt(0.005s) 단위 계단 함수이므로 기존과 같이 0.01s 이내면 수렴으로 간주
+        # (0을 반환하면 brentq가 즉시 종료)
         error = real_tb - tb_target
-        if abs(error) < 0.01:
-            best_core = test_core; best_L = test_L; sim_res = (real_tb, real_imp, real_P, 0)
-            break
-        
-        if real_tb > tb_target: min_core = test_core
-        else: max_core = test_core
-            
-        best_core = test_core; best_L = test_L; sim_res = (real_tb, real_imp, real_P, 0)
+        return 0.0 if abs(error) < 0.01 else error
+    
+    # 연소 시간은 코어 직경에 대해 단조가 아님 (소형 모터는 중간 코어에서 최대가 됨)
+    # -> 양 끝점이 목표를 감싸지 못하면 거친 격자로 부호가 바뀌는 구간을 찾은 뒤 Brent 방법 적용
+    bracket = None
+    best = None  # (|오차|, 코어, 길이, 결과): 구간을 못 찾을 때 가장 가까운 점 사용
+    
+    def scan(core):
+        nonlocal best
+        err = burn_time_error(core)
+        if best is None or abs(err) < best[0]:
+            best = (abs(err), last['core'], last['L'], last['res'])
+        return err
+    
+    err_min = scan(min_core)
+    err_max = scan(max_core) if err_min != 0.0 else 0.0
+    
+    if err_min != 0.0 and err_max != 0.0:
+        if err_min * err_max < 0:
+            bracket = (min_core, max_core)
+        else:
+            # 큰 코어 쪽부터 훑어 연소 시간이 감소하며 목표를 지나는 구간을 우선 선택 (기존 이분법과 같은 가지)
+            cores = np.linspace(min_core, max_core, 9)
+            errs = [err_min] + [None] * 7 + [err_max]
+            for i in range(7, 0, -1):
+                errs[i] = scan(cores[i])
+                if errs[i] == 0.0:
+                    break
+                if errs[i] * errs[i + 1] < 0:
+                    bracket = (cores[i], cores[i + 1])
+                    break
+            else:
+                if errs[0] * errs[1] < 0:
+                    bracket = (cores[0], cores[1])
+    
+    if bracket is not None:
+        root = brentq(burn_time_error, bracket[0], bracket[1], xtol=1e-5, rtol=1e-4, maxiter=15, disp=False)
+        if last['core'] != root:
+            burn_time_error(root)
+    else:
+        # 이미 수렴한 점이 있거나 목표가 탐색 범위 밖이면 가장 가까운 점 사용
+        last['core'], last['L'], last['res'] = best[1], best[2], best[3]
+    
+    best_core = last['core']
+    best_L = last['L']
+    sim_res = last['res']
 
     real_tb, real_imp, real_P, _ = sim_res
     
@@ -156,12 +124,16 @@ def calculate_grain_geometry(D_chamber_mm, t_liner_mm, m_prop, At, tb_target,
         "sim_total_impulse": real_imp
     }
 
-def plot_grain_geometry(grain_res, container=None):
-    if "error" in grain_res: return
-    D = grain_res['D_grain_mm']
-    d = grain_res['d_core_mm']
-    L = grain_res['L_grain_mm']
-    fig = plt.figure(figsize=(10, 4))
+def make_grain_figure(D, d, L, fig=None):
+    """
+    그레인 치수(D, d, L [mm])로 단면/측면 Figure 생성 (표시는 호출자가 담당)
+    fig를 주지 않으면 pyplot 전역 상태를 거치지 않는 Figure를 직접 생성 (plt.close 불필요)
+    """
+    # matplotlib은 그림을 그릴 때만 임포트 (탄도 계산만 쓰는 경우 임포트 비용 절약)
+    import matplotlib.patches as patches
+    if fig is None:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(10, 4))
     ax_top = fig.add_subplot(121)
     ax_side = fig.add_subplot(122)
     propellant_color = '#F4A460'
@@ -178,5 +150,15 @@ def plot_grain_geometry(grain_res, container=None):
     ax_side.text(D/2+5, L/2, f"L={L:.1f}", ha='left', va='center')
     ax_side.set_xlim(-D*0.7, D*0.7); ax_side.set_ylim(-L*0.1, L*1.1); ax_side.axis('off'); ax_side.set_title("Longitudinal View")
 
-    if container: container.pyplot(fig)
-    else: plt.show()
+    return fig
+
+def plot_grain_geometry(grain_res, container=None):
+    if "error" in grain_res: return
+    dims = (grain_res['D_grain_mm'], grain_res['d_core_mm'], grain_res['L_grain_mm'])
+
+    if container: container.pyplot(make_grain_figure(*dims))
+    else:
+        # 창 표시(plt.show)는 pyplot이 관리하는 Figure만 가능
+        import matplotlib.pyplot as plt
+        make_grain_figure(*dims, fig=plt.figure(figsize=(10, 4)))
+        plt.show()
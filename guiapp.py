@@ -1,25 +1,102 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
 import traceback
+import io
 
 # 모듈 임포트 (파일 이름이 정확해야 합니다)
+import flight_sim
+import _ballistics_numba
 from flight_sim import simulate_flight
 from main import optimize_rocket_design
-from grain_design import calculate_grain_geometry, plot_grain_geometry
-from rocket_utils import isa_atmosphere
+from grain_design import calculate_grain_geometry, make_grain_figure
+from rocket_utils import isa_density_lut
+
+# --- Cached Computations ---
+# 입력값이 같으면 Streamlit 재실행 시 계산을 건너뜀 (인자는 모두 스칼라이므로 해싱 비용이 작음)
+# ttl/max_entries로 세션이 길어져도 캐시 메모리가 무한히 늘지 않도록 제한
+@st.cache_data(ttl=3600, max_entries=128)
+def _cached_optimize(h_target, m0, mp, CD_A, tb, k, epsilon, P0, P_percentage, c_star, efficiency):
+    return optimize_rocket_design(
+        h_target, m0, mp, CD_A, tb, k, epsilon, P0, P_percentage, c_star,
+        efficiency=efficiency
+    )
+
+@st.cache_data(ttl=3600, max_entries=128)
+def _cached_simulate(F_avg, tb, m0, mp, CD_A):
+    return simulate_flight(F_avg, tb, m0, mp, CD_A)
+
+def _make_flight_fig():
+    """비행 프로파일 Figure 골격(축/빈 선) 생성"""
+    # pyplot 전역 상태를 거치지 않는 Figure 직접 생성 (스레드별 세션에서 안전, plt.close 불필요)
+    from matplotlib.figure import Figure  # 첫 실행(그래프 표시 시점)까지 임포트 지연
+    fig = Figure(figsize=(12, 8))
+    axes = fig.subplots(2, 2)
+    specs = [
+        (axes[0,0], 'dodgerblue', 'Altitude Profile (m)', 'Altitude (m)'),
+        (axes[0,1], 'orangered', 'Velocity Profile (m/s)', 'Velocity (m/s)'),
+        (axes[1,0], 'seagreen', 'Mass Flow Rate (kg/s)', 'Mass Flow (kg/s)'),
+        (axes[1,1], 'purple', 'Drag Force (N)', 'Drag (N)'),
+    ]
+    lines = []
+    for ax, color, title, ylabel in specs:
+        line, = ax.plot([], [], color=color, lw=2)
+        ax.set_title(title)
+        ax.set_ylabel(ylabel)
+        ax.grid(True, alpha=0.3)
+        lines.append(line)
+    return fig, lines
+
+def _get_flight_fig():
+    """
+    세션별로 Figure 골격을 한 번만 만들어 재실행 간 재사용
+    (cache_resource로 서버 전체에 공유하면 동시 실행 세션끼리 같은 Figure를 수정해 서로의 궤적이 섞일 수 있음)
+    """
+    if "flight_fig" not in st.session_state:
+        st.session_state["flight_fig"] = _make_flight_fig()
+    return st.session_state["flight_fig"]
+
+@st.cache_data(ttl=3600, max_entries=32)
+def _cached_grain_png(D, d, L):
+    """그레인 형상 그림은 치수(D, d, L)에만 의존하므로 PNG 바이트로 렌더링해 캐시 (반복 시 Matplotlib 생략)"""
+    fig = make_grain_figure(D, d, L)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")  # st.pyplot 기본 렌더링과 동일
+    return buf.getvalue()
+
+@st.cache_data(ttl=3600, max_entries=128)
+def _cached_grain(D_chamber_mm, t_liner_mm, m_prop, At, tb_target, P_avg_pa, prop_density, c_star, efficiency):
+    return calculate_grain_geometry(
+        D_chamber_mm=D_chamber_mm,
+        t_liner_mm=t_liner_mm,
+        m_prop=m_prop,
+        At=At,
+        tb_target=tb_target,
+        P_avg_pa=P_avg_pa,
+        prop_density=prop_density,
+        c_star=c_star,
+        efficiency=efficiency,
+        grain_type="BATES"
+    )
+
+@st.cache_resource
+def _warmup_kernels():
+    """서버 프로세스당 한 번 Numba 커널을 준비 (첫 'Run' 클릭 시 JIT 컴파일 지연 제거)"""
+    flight_sim.warmup()
+    _ballistics_numba.warmup()
 
 # --- Streamlit App UI Configuration ---
 st.set_page_config(page_title="KNSB Rocket Simulator & Designer", layout="wide")
+_warmup_kernels()
 
 st.title("🚀 KNSB Solid Fuel Rocket Design & Flight Simulator")
 st.markdown("""
-이 도구는 **PROPEP3**의 화학 평형 데이터와 **RK45 수치 해석**을 결합하여 고체 로켓의 성능을 예측합니다.
+이 도구는 **PROPEP3**의 화학 평형 데이터와 **RK4 수치 해석**을 결합하여 고체 로켓의 성능을 예측합니다.
 사이드바에서 파라미터를 입력하고 'Run Simulation'을 클릭하세요.
 """)
 
 # --- Sidebar for User Inputs ---
-with st.sidebar:
+# 폼으로 묶어 입력값을 바꿀 때마다 재실행되지 않고 제출 버튼을 누를 때 한 번만 재실행
+with st.sidebar.form("design_form"):
     st.header("🛠️ Design Parameters")
 
     # 1. Propellant Thermochemistry
@@ -71,15 +148,15 @@ with st.sidebar:
     t_liner_in = st.number_input("Liner/Tube Thickness (mm)", value=2.0, format="%.1f")
 
     st.markdown("---")
-    run_button = st.button("Run Simulation & Design", use_container_width=True, type="primary")
+    run_button = st.form_submit_button("Run Simulation & Design", use_container_width=True, type="primary")
 
 # --- Main Panel for Results ---
 if run_button:
     try:
         # 1. 최적화 알고리즘 실행 (Efficiency 인자 전달)
-        results = optimize_rocket_design(
+        results = _cached_optimize(
             h_target, m0, mp, CD_A, tb, k_gamma, epsilon, P0, P_percentage, c_star_input, 
-            efficiency=efficiency_factor # 효율 반영
+            efficiency_factor # 효율 반영
         )
         
         # Dictionary Key 매핑 (대소문자 주의)
@@ -94,7 +171,7 @@ if run_button:
         target_total_impulse = F_avg * tb 
 
         # 2. 비행 시뮬레이션 수행
-        t_sim, y_sim = simulate_flight(F_avg, tb, m0, mp, CD_A)
+        t_sim, y_sim = _cached_simulate(F_avg, tb, m0, mp, CD_A)
         
         if len(t_sim) > 0:
             idx_ap = int(np.nanargmax(y_sim[0]))
@@ -104,7 +181,7 @@ if run_button:
             t_apogee, v_max = 0.0, 0.0
         
         # 3. 그레인 형상 설계 (OpenMotor 방식 시뮬레이션 포함)
-        grain_res = calculate_grain_geometry(
+        grain_res = _cached_grain(
             D_chamber_mm=D_chamber_in,
             t_liner_mm=t_liner_in,
             m_prop=mp,
@@ -113,8 +190,7 @@ if run_button:
             P_avg_pa=P0 * P_percentage,
             prop_density=prop_rho,
             c_star=c_star_input,
-            efficiency=efficiency_factor, # ★★★ [수정] 이 줄을 꼭 추가해주세요!
-            grain_type="BATES"
+            efficiency=efficiency_factor # ★★★ [수정] 이 줄을 꼭 추가해주세요!
         )
 
         # --- Display Summary Metrics ---
@@ -125,37 +201,32 @@ if run_button:
         col3.metric("Average Thrust", f"{F_avg:.1f} N")
 
         # --- Plotting Flight Profiles ---
-        fig, axes = plt.subplots(2, 2, figsize=(12, 8))
+        # 캐시된 Figure를 재사용하고 선 데이터만 교체
+        fig, lines = _get_flight_fig()
+        line_alt, line_vel, line_mdot, line_drag = lines
         
-        # Altitude
-        axes[0,0].plot(t_sim, y_sim[0], color='dodgerblue', lw=2)
-        axes[0,0].set_title('Altitude Profile (m)')
-        axes[0,0].set_ylabel('Altitude (m)')
-        axes[0,0].grid(True, alpha=0.3)
-        
-        # Velocity
-        axes[0,1].plot(t_sim, y_sim[1], color='orangered', lw=2)
-        axes[0,1].set_title('Velocity Profile (m/s)')
-        axes[0,1].set_ylabel('Velocity (m/s)')
-        axes[0,1].grid(True, alpha=0.3)
+        # Altitude / Velocity
+        line_alt.set_data(t_sim, y_sim[0])
+        line_vel.set_data(t_sim, y_sim[1])
         
         # Mass Flow
         mdot_array = np.where(t_sim <= tb, mp / tb, 0.0)
-        axes[1,0].plot(t_sim, mdot_array, color='seagreen', lw=2)
-        axes[1,0].set_title('Mass Flow Rate (kg/s)')
-        axes[1,0].set_ylabel('Mass Flow (kg/s)')
-        axes[1,0].grid(True, alpha=0.3)
+        line_mdot.set_data(t_sim, mdot_array)
         
         # Drag
-        rho_arr = np.array([isa_atmosphere(max(0.0, float(h)))[0] for h in y_sim[0]])
-        drag_array = 0.5 * rho_arr * CD_A * (y_sim[1] ** 2)
-        axes[1,1].plot(t_sim, drag_array, color='purple', lw=2)
-        axes[1,1].set_title('Drag Force (N)')
-        axes[1,1].set_ylabel('Drag (N)')
-        axes[1,1].grid(True, alpha=0.3)
+        rho_arr = isa_density_lut(y_sim[0])  # 음수 고도는 해면 밀도로 처리
+        # 임시 배열 없이 한 버퍼에서 제자리 연산: 0.5 * CD_A * rho * v^2
+        drag_array = np.square(y_sim[1])
+        drag_array *= rho_arr
+        drag_array *= 0.5 * CD_A
+        line_drag.set_data(t_sim, drag_array)
+        
+        for line in lines:
+            line.axes.relim()
+            line.axes.autoscale_view()
 
-        plt.tight_layout()
-        st.pyplot(fig)
+        fig.tight_layout()
+        st.pyplot(fig, clear_figure=False)
 
         # --- Detailed Performance Data ---
         st.subheader("📋 Motor Performance Comparison")
@@ -207,8 +278,13 @@ if run_button:
 
             st.info(f"**Design Note:** 목표 연소 시간({tb}s)을 맞추기 위해 시뮬레이션된 BATES 그레인의 코어 직경은 **{grain_res['d_core_mm']:.1f}mm** 입니다.")
             
-            # Grain Plot (컨테이너 전달)
-            plot_grain_geometry(grain_res, container=st)
+            # Grain Plot (치수를 0.1mm 단위로 반올림해 미세한 수치 차이에도 캐시 재사용)
+            grain_png = _cached_grain_png(
+                round(grain_res['D_grain_mm'], 1),
+                round(grain_res['d_core_mm'], 1),
+                round(grain_res['L_grain_mm'], 1)
+            )
+            st.image(grain_png, width="stretch")
 
     except Exception as e:
         st.error("시뮬레이션 중 오류가 발생했습니다.")
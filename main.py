@@ -1,7 +1,7 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from scipy.optimize import brentq
 from rocket_utils import calculate_nozzle_dimensions
-from flight_sim import simulate_flight
+from flight_sim import simulate_flight, simulate_flight_batch
 
 def optimize_rocket_design(h_target, m0, mp, CD_A, tb, k, epsilon, P0, P_percentage, c_star, efficiency=0.92, verbose=False):
     """
@@ -14,35 +14,59 @@ def optimize_rocket_design(h_target, m0, mp, CD_A, tb, k, epsilon, P0, P_percent
     # 주의: 여기서 F_test는 '실제 발휘해야 하는 추력'입니다.
     # 시뮬레이션은 F_test 물리량을 그대로 쓰므로 여기선 수정 불필요
     F_min, F_max = 10.0, 1000.0
-    F_req = 0
-    h_max = 0
-    iter_count = 0
-    
-    while iter_count < 50:
-        iter_count += 1
-        F_test = (F_min + F_max) / 2
-        
-        t, y = simulate_flight(F_test, tb, m0, mp, CD_A)
-        h_current = np.max(y[0])
-        
-        if abs(h_current - h_target) < 1.0:
-            F_req = F_test
-            h_max = h_current
-            break
-        
-        if h_current < h_target:
-            F_min = F_test
-        else:
-            F_max = F_test
-            
-    F_req = (F_min + F_max) / 2
+    
+    # 탐색도 최종 궤적과 같은 기본 해상도(0.05s)로 적분
+    # (거친 스텝으로 근을 찾으면 가속이 큰 설계에서 RK4 오차만큼 추력이 틀어짐)
+    # 수렴 판정은 고도 기준: 목표 ±1m 이내면 0을 반환해 brentq를 즉시 종료
+    # (추력 기준 xtol만 쓰면 가벼운 로켓은 dh/dF가 수십 m/N이라 1m를 넘게 빗나감)
+    def apogee_errors(F_arr):
+        err = simulate_flight_batch(np.asarray(F_arr, dtype=np.float64), tb, m0, mp, CD_A) - h_target
+        err[np.abs(err) < 1.0] = 0.0
+        return err
+    
+    def apogee_error(F):
+        return apogee_errors([F])[0]
+    
+    # 초기 추정: 항력을 무시한 에너지 보존 (연소 중 일정 가속 a, 이후 탄도 상승)
+    #   h = a*tb^2/2 + (a*tb)^2/(2g)  ->  a에 대한 2차식의 양의 근
+    #   F = m_avg*(a + g), m_avg = m0 - mp/2
+    g0 = 9.80665
+    qa, qb = tb**2 / (2 * g0), tb**2 / 2
+    a_est = (-qb + np.sqrt(qb**2 + 4 * qa * max(h_target, 0.0))) / (2 * qa)
+    F_guess = (m0 - mp / 2) * (a_est + g0)
+    
+    # 추정값 주변 [0.5F, 2F]로 구간을 잡고, 목표를 감싸지 못하면 2배씩 넓힘
+    # 양 끝을 모두 [F_min, F_max]로 클램프하므로 추정값이 한계 밖이어도 F_lo <= F_hi이고,
+    # 넓히는 루프는 한계에 닿으면 멈춤 (최대 log2(F_max/F_min)회)
+    F_lo = min(max(F_min, 0.5 * F_guess), F_max)
+    F_hi = min(max(F_min, 2.0 * F_guess), F_max)
+    err_lo, err_hi = apogee_errors([F_lo, F_hi])
+    while err_lo > 0 and F_lo > F_min:
+        F_hi, err_hi = F_lo, err_lo
+        F_lo = max(F_min, F_lo / 2)
+        err_lo = apogee_error(F_lo)
+    while err_hi < 0 and F_hi < F_max:
+        F_lo, err_lo = F_hi, err_hi
+        F_hi = min(F_max, F_hi * 2)
+        err_hi = apogee_error(F_hi)
+    
+    # 최고 고도는 추력에 대해 단조·연속이므로 Brent 방법으로 근을 찾음
+    # (끝점이 이미 ±1m 이내(오차 0)이거나 목표가 탐색 범위 밖이면 해당 끝점 사용)
+    if err_lo >= 0:
+        F_req = F_lo
+    elif err_hi <= 0:
+        F_req = F_hi
+    else:
+        F_req = brentq(apogee_error, F_lo, F_hi, xtol=1e-3)
+    
+    t, y = simulate_flight(F_req, tb, m0, mp, CD_A)
+    h_max = np.max(y[0])
     
     # 2. 노즐 설계 치수 계산 (효율 반영)
     # F_req를 내기 위해, 효율이 낮으면 노즐 목(At)을 키웁니다.
     nozzle_dim = calculate_nozzle_dimensions(F_req, P0, P_percentage, epsilon, k, c_star, efficiency)
     
     # 3. Isp 계산 (실제 출력 기준)
-    g0 = 9.80665
     m_dot = mp / tb
     Isp_phys = F_req / (m_dot * g0)
 
@@ -50,11 +74,11 @@ def optimize_rocket_design(h_target, m0, mp, CD_A, tb, k, epsilon, P0, P_percent
         "F_req": F_req,
         "h_max": h_max,
         "Isp_phys": Isp_phys,
-        "At": nozzle_dim['At'],
-        "Dt": nozzle_dim['Dt'],
-        "Ae": nozzle_dim['Ae'],
-        "De": nozzle_dim['De'],
-        "CF": nozzle_dim['CF'],
+        "At": nozzle_dim.At,
+        "Dt": nozzle_dim.Dt,
+        "Ae": nozzle_dim.Ae,
+        "De": nozzle_dim.De,
+        "CF": nozzle_dim.CF,
         "m_dot": m_dot
     }
     
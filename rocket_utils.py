@@ -1,37 +1,101 @@
+from bisect import bisect_right
+from functools import lru_cache
+import math
+from typing import NamedTuple
 import numpy as np
-from scipy.optimize import fsolve
+
+# --- ISA 대기층 테이블 (SoA: 층별 기준 고도 / 기준 온도 / 감률 / 기준 압력 / 압력 지수) ---
+_G0 = 9.80665
+_R_AIR = 287.05
+_H = np.array([0.0, 11000.0, 20000.0, 32000.0])        # 층 기준 고도 (m)
+_T0 = np.array([288.15, 216.65, 216.65, 228.65])       # 층 기준 온도 (K)
+_L = np.array([0.0065, 0.0, -0.001, -0.0028])          # 온도 감률 (K/m), T = T0 - L*(h - H)
+_EXP = np.array([5.2561, 0.0, _G0 / (_R_AIR * -0.001), _G0 / (_R_AIR * -0.0028)])  # P = P0*(T/T0)**EXP
+_P0 = np.array([101325.0, 22632.0, 0.0, 0.0])          # 층 기준 압력 (Pa)
+# 20km, 32km 기준 압력은 아래층 식과 연속이 되도록 계산
+_P0[2] = _P0[1] * np.exp(-_G0 * (_H[2] - _H[1]) / (_R_AIR * _T0[1]))
+_P0[3] = _P0[2] * ((_T0[2] - _L[2] * (_H[3] - _H[2])) / _T0[2])**_EXP[2]
+_H_LIST = _H.tolist()
+_RHO0 = _P0 / (_R_AIR * _T0)                           # 층 기준 밀도 (kg/m³)
+# 밀도 = RHO0 * (T/T0)**(EXP-1) * exp(-ISO_K*dh)
+#   감률층: EXP-1 지수 항만, 등온층(EXP=0, T=T0): exp 항만 남음 -> 층 종류에 따른 분기 불필요
+_EXPM1 = _EXP - 1.0
+_ISO_K = np.where(_L == 0.0, _G0 / (_R_AIR * _T0), 0.0)
+# Numba 커널 인자용 묶음 (행: H, T0, L, RHO0, EXP-1, ISO_K)
+# 커널이 전역 배열을 읽으면 컴파일 시점 상수로 고정되고, 다른 파일의 디스크 캐시는 이 파일 수정을 감지하지 못하므로 인자로 전달
+ISA_LAYER_TABLE = np.ascontiguousarray(np.vstack((_H, _T0, _L, _RHO0, _EXPM1, _ISO_K)))
+ISA_LAYER_TABLE.flags.writeable = False
+
+# 대기 모델 진입점 (모두 위 테이블 사용)
+#   isa_atmosphere(h)  : 스칼라, (rho, Pa)
+#   isa_density(h)     : ndarray, rho만
+#   isa_density_lut(h) : ndarray, 0~12km 표 보간 (그래프용 고속 경로)
+#   ISA_LAYER_TABLE    : flight_sim Numba 커널(_isa_density)에 넘기는 테이블
 
 def isa_atmosphere(h):
     """ISA standard atmosphere model"""
-    if 0 <= h < 11000:
-        T = 288.15 - 0.0065 * h
-        Pa = 101325 * (T / 288.15)**5.2561
-        rho = Pa / (287.05 * T)
-    elif h >= 11000:
-        T_11km = 216.65
-        Pa_11km = 22632
-        rho = Pa_11km / (287.05 * T_11km) * np.exp(-9.80665 * (h - 11000) / (287.05 * T_11km))
+    h = max(h, 0.0)  # 지면 아래는 해면 기준값
+    i = bisect_right(_H_LIST, h) - 1
+    T = _T0[i] - _L[i] * (h - _H[i])
+    if _L[i] == 0.0:
+        Pa = _P0[i] * np.exp(-_G0 * (h - _H[i]) / (_R_AIR * _T0[i]))
     else:
-        rho = 1.225
-        Pa = 101325
-    return rho, Pa
+        Pa = _P0[i] * (T / _T0[i])**_EXP[i]
+    rho = Pa / (_R_AIR * T)
+    return float(rho), float(Pa)
+
+def isa_density(h):
+    """ISA 대기 밀도만 계산 (ndarray 입력용, 압력이 필요 없는 항력 계산 등에 사용)"""
+    # flight_sim._isa_density와 같은 식 (압력 배열을 만들지 않음)
+    h = np.maximum(np.asarray(h, dtype=np.float64), 0.0)
+    idx = np.searchsorted(_H, h, side='right') - 1
+    T0 = _T0[idx]
+    dh = h - _H[idx]
+    return _RHO0[idx] * ((T0 - _L[idx] * dh) / T0)**_EXPM1[idx] * np.exp(-_ISO_K[idx] * dh)
+
+# 0~12km 밀도 표 (50m 간격, 모듈 로드 시 한 번 생성). 선형 보간 상대 오차 < 1e-4
+_H_LUT = np.linspace(0.0, 12000.0, 241)
+_RHO_LUT = isa_density(_H_LUT)
 
+def isa_density_lut(h):
+    """표 보간(np.interp)으로 ISA 밀도 계산 (스칼라/ndarray 입력, 표 범위 밖은 isa_density로 계산)"""
+    h = np.asarray(h, dtype=np.float64)
+    h1 = np.atleast_1d(h)                   # 스칼라 입력도 아래 부분 대입이 가능하도록 1차원으로
+    rho = np.interp(h1, _H_LUT, _RHO_LUT)   # 음수 고도는 표 첫 값(해면)으로 고정
+    high = h1 > _H_LUT[-1]
+    if high.any():
+        rho[high] = isa_density(h1[high])
+    return rho.reshape(h.shape)[()]         # 입력과 같은 형태로 반환 (스칼라 -> 스칼라)
+
+@lru_cache(maxsize=64)
 def calculate_Ma(epsilon, k):
-    """Calculate Mach number from area ratio"""
-    def equation(Ma):
-        if Ma <= 0: return 999 
-        term1 = 1.0 / Ma
-        term2 = (2 / (k + 1)) * (1 + (k - 1) / 2 * Ma**2)
-        exponent = (k + 1) / (2 * (k - 1))
-        return term1 * (term2 ** exponent) - epsilon
+    """
+    Calculate Mach number from area ratio (초음속 해)
+    면적비 식 A/A* = (1/Ma)*[(2/(k+1))*(1+(k-1)/2*Ma^2)]^((k+1)/(2(k-1)))의 로그를
+    해석적 도함수로 Newton 반복하여 풉니다. (로그를 취하면 Ma에 대해 거의 선형이라 5~8회 내 수렴)
+    """
+    exponent = (k + 1) / (2 * (k - 1))
+    c = 2 / (k + 1)
+    log_eps = math.log(epsilon)
 
-    Ma_sol = fsolve(equation, 2.0)[0]
-    return Ma_sol
+    Ma = 2.0
+    for _ in range(20):
+        term2 = c * (1 + (k - 1) / 2 * Ma**2)
+        f = exponent * math.log(term2) - math.log(Ma) - log_eps
+        df = (Ma**2 - term2) / (term2 * Ma)
+        Ma_new = Ma - f / df
+        if Ma_new <= 1.0:
+            Ma_new = (Ma + 1.0) / 2  # 아음속 해로 넘어가지 않도록
+        if abs(Ma_new - Ma) < 1e-10 * Ma:
+            return Ma_new
+        Ma = Ma_new
+    return Ma
 
-def calculate_nozzle_dimensions(F_req, P0, P_percentage, epsilon, k, c_star, efficiency=0.92):
+@lru_cache(maxsize=64)
+def _cf_constants(k, epsilon):
     """
-    효율 계수(efficiency)를 반영하여 노즐을 설계합니다.
-    efficiency: 총 효율 (기본값 0.92 권장)
+    (k, epsilon)에만 의존하는 열역학 항 (압력/효율과 무관하므로 따로 캐시)
+    반환: (Ma_exit, Pe_ratio, CF_ideal_momentum)
     """
     # 1. 출구 마하수 계산
     Ma = calculate_Ma(epsilon, k)
@@ -39,38 +103,70 @@ def calculate_nozzle_dimensions(F_req, P0, P_percentage, epsilon, k, c_star, eff
     # 2. 압력비
     Pe_ratio = (1 + (k - 1) / 2 * Ma**2)**(-k / (k - 1))
     
-    Pa_SL = 101325
-    Pc = P0 * P_percentage
-    
-    # 3. 이상적인 CF 계산
+    # 3. 이상적인 CF 운동량 항
     term1 = (2 * k**2 / (k - 1))
     term2 = (2 / (k + 1))**((k + 1) / (k - 1))
     term3 = (1 - Pe_ratio**((k - 1) / k))
+    return Ma, Pe_ratio, math.sqrt(term1 * term2 * term3)
+
+@lru_cache(maxsize=64)
+def _compute_CF(k, epsilon, P0, P_percentage, efficiency):
+    """
+    추력 계수 계산 (F_req와 무관하므로 입력 스칼라 기준으로 캐시)
+    반환: (CF_real, CF_ideal, Ma_exit)
+    """
+    Ma, Pe_ratio, CF_ideal_momentum = _cf_constants(k, epsilon)
+    
+    Pa_SL = 101325
+    Pc = P0 * P_percentage
     
-    CF_ideal_momentum = np.sqrt(term1 * term2 * term3)
     CF_ideal_pressure = (Pe_ratio - Pa_SL / Pc) * epsilon
     
     # [핵심 수정] 실제 CF = 이상적 CF * 효율
     CF_ideal = CF_ideal_momentum + CF_ideal_pressure
     CF_real = CF_ideal * efficiency
-    
+    return CF_real, CF_ideal, Ma
+
+def _size_throat(F_req, Pc, CF, epsilon):
+    """요구 추력과 CF로 노즐 목/출구 치수 계산. 반환: (At, Dt, Ae, De)"""
     # 4. 노즐 목 설계 (실제 효율이 반영된 CF 사용)
     # F = Pc * At * CF_real  ->  At = F / (Pc * CF_real)
     # 효율이 낮을수록 At는 더 커져야 함
-    At = F_req / (Pc * CF_real)
+    At = F_req / (Pc * CF)
     Dt = np.sqrt(4 * At / np.pi)
     
     # 5. 출구 설계
     Ae = At * epsilon
     De = np.sqrt(4 * Ae / np.pi)
+    return At, Dt, Ae, De
+
+class NozzleDims(NamedTuple):
+    """노즐 설계 결과 (SI 단위)"""
+    At: float         # 노즐 목 면적 (m²)
+    Dt: float         # 노즐 목 직경 (m)
+    Ae: float         # 출구 면적 (m²)
+    De: float         # 출구 직경 (m)
+    CF: float         # 실제 추력 계수 (효율 반영)
+    CF_ideal: float   # 이상 추력 계수
+    Ma_exit: float    # 출구 마하수
+    Pc_avg: float     # 평균 연소실 압력 (Pa)
+
+def calculate_nozzle_dimensions(F_req, P0, P_percentage, epsilon, k, c_star, efficiency=0.92):
+    """
+    효율 계수(efficiency)를 반영하여 노즐을 설계합니다.
+    efficiency: 총 효율 (기본값 0.92 권장)
+    """
+    CF_real, CF_ideal, Ma = _compute_CF(float(k), float(epsilon), float(P0), float(P_percentage), float(efficiency))
+    Pc = P0 * P_percentage
+    At, Dt, Ae, De = _size_throat(F_req, Pc, CF_real, epsilon)
     
-    return {
-        "At": At,
-        "Dt": Dt,
-        "Ae": Ae,
-        "De": De,
-        "CF": CF_real,      # 실제 CF 반환
-        "CF_ideal": CF_ideal,
-        "Ma_exit": Ma,
-        "Pc_avg": Pc
-    }
+    return NozzleDims(
+        At=At,
+        Dt=Dt,
+        Ae=Ae,
+        De=De,
+        CF=CF_real,         # 실제 CF 반환
+        CF_ideal=CF_ideal,
+        Ma_exit=Ma,
+        Pc_avg=Pc
+    )